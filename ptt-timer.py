@@ -1,7 +1,7 @@
 '''
   ptt-timer.py -- push-to-talk countdown timer
   Copyright (C) 2025 Mark Adler
-  Version 1.4  2 Sep 2025  Mark Adler
+  Version 1.5  14 Oct 2026  Mark Adler
 
   This software is provided 'as-is', without any express or implied
   warranty.  In no event will the author be held liable for any damages
@@ -36,6 +36,19 @@
 #   1.3  15 Aug 2025  Adjust times spacing on display
 #                     Add link to demonstration video to README
 #   1.4   2 Sep 2025  Use three letters for month instead of spelling it out
+#   1.5  14 Oct 2026  Format the date and times only when the second changes
+#                     Update the display only when what it shows changes
+#                     Send only the changed parts of the image to the display
+#                     Render each piece of text once, and paste it after that
+#                     Wait for switch changes instead of polling the switches
+#                     Read the switches directly from the GPIO level register
+#                     Convert the image to the display's pixels using NumPy
+#                     Write the pixels to the display directly with spidev
+#                     Draw the image with a palette, for one byte per pixel
+#                     Dispatch on the state of all three switches at once
+#                     Run the buzzer from its own thread
+#                     Make the status lines once instead of on every pass
+#                     Clear and redraw only the rows of text that changed
 
 # Provide a push-to-talk countdown timer on a Raspberry Pi with a Mini PiTFT
 # 135x240 display ($10 at https://www.adafruit.com/product/4393). Also show the
@@ -88,15 +101,30 @@
 #
 # https://learn.adafruit.com/circuitpython-on-raspberrypi-linux/installing-circuitpython-on-raspberry-pi
 # https://learn.adafruit.com/adafruit-mini-pitft-135x240-color-tft-add-on-for-raspberry-pi/python-setup
+#
+# The numpy and spidev modules are also needed, installed with "pip3 install
+# numpy spidev".
+#
+# The gpiozero module is also needed, for the switch interrupts. It comes with
+# Raspberry Pi OS, and can be installed in the virtual environment with "pip3
+# install gpiozero lgpio".
 
 import time
+import re
+import os
+import mmap
+import struct
 from datetime import datetime
 import signal
+import threading
 import board
 import digitalio
 import pwmio
+import numpy
+import spidev
+from gpiozero import Button
 from adafruit_rgb_display import st7789
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageChops, ImageDraw, ImageFont
 
 # Catch a shutdown to turn off the display. Otherwise it stays on with the last
 # content so long as there is power, even after the shutdown completes!
@@ -104,19 +132,46 @@ def sigterm(*_):
     raise(KeyboardInterrupt)
 signal.signal(signal.SIGTERM, sigterm)
 
-# Setup the ST7789 display.
+# Setup the ST7789 display. The driver is only used to initialize it. After
+# that, the pixels are written directly by block() below. The 135x240 display
+# is at offset xoff, yoff in the ST7789's 240x320 memory.
+dc = digitalio.DigitalInOut(board.D25)
+cs = digitalio.DigitalInOut(board.CE0)
+xoff, yoff = 53, 40
 disp = st7789.ST7789(
-    board.SPI(),
-    digitalio.DigitalInOut(board.D25),
-    digitalio.DigitalInOut(board.CE0),
+    board.SPI(), dc, cs,
     None, 135, 240, 64000000,
-    x_offset = 53, y_offset = 40)
+    x_offset = xoff, y_offset = yoff)
+
+# Open the SPI device directly, in order to send each block of pixels to the
+# display in one writebytes2() call. That call takes the pixel buffer as is,
+# and splits it into transfers in C. Going through board.SPI() instead copies
+# the data to an array and into ctypes buffers in Python. The chip select and
+# the data/command pins are still controlled with digitalio.
+spi = spidev.SpiDev()
+spi.open(0, 0)
+spi.max_speed_hz = 64000000
+spi.mode = 0
+
+# Write data to the block of the display from x0, y0 to x1, y1 inclusive, in
+# the display's portrait coordinates. This sends the column and row address set
+# commands (0x2a and 0x2b), and then the memory write command (0x2c) followed
+# by the data.
+def block(x0, y0, x1, y1, data):
+    cs.value = False
+    for command, param in ((0x2a, struct.pack(">HH", x0 + xoff, x1 + xoff)),
+                           (0x2b, struct.pack(">HH", y0 + yoff, y1 + yoff)),
+                           (0x2c, data)):
+        dc.value = False
+        spi.writebytes2((command,))
+        dc.value = True
+        spi.writebytes2(param)
+    cs.value = True
 
 # Create an image buffer for drawing. Swap width and height for landscape view.
 width = disp.height
 height = disp.width
-rotation = 90
-image = Image.new("RGB", (width, height))
+image = Image.new("P", (width, height))
 draw = ImageDraw.Draw(image)
 
 # Basic colors.
@@ -129,141 +184,394 @@ magenta = (255, 0, 255)
 yellow = (255, 255, 0)
 white = (255, 255, 255)
 
+# The image is drawn with a palette, so that each pixel is one byte instead of
+# three. The palette has black, and then 31 shades of each of the other colors
+# for the antialiased edges of text, from dark to full. ink[color] is the
+# palette index of the full color. rgb565 is the palette in the display's
+# 16-bit pixels, big-endian.
+ink = {black: 0}
+palette = [black]
+for color in (red, green, blue, cyan, magenta, yellow, white):
+    palette += [tuple((v * k + 15) // 31 for v in color) for k in range(1, 32)]
+    ink[color] = len(palette) - 1
+image.putpalette([v for rgb in palette for v in rgb])
+rgb565 = numpy.array([(r & 0xf8) << 8 | (g & 0xfc) << 3 | b >> 3
+                      for r, g, b in palette], dtype=">u2")
+
+# The 16-bit RGB565 pixels to send to the display, big-endian. This buffer is
+# reused for every box sent, with the pixels written into it by NumPy through
+# the words view. disp.image() would instead make a list of every byte.
+pixels = bytearray(width * height * 2)
+words = numpy.frombuffer(pixels, dtype=">u2")
+
+# Send the box from x0, y0 to x1, y1 in the image to the display. This is used
+# in place of disp.image(). The display is drawn in portrait, so with the 90
+# degree rotation the box lands from y0, width - x1 to y1, width - x0 on the
+# display. Each pixel is converted with a lookup of its palette index.
+def send(x0, y0, x1, y1):
+    n = (x1 - x0) * (y1 - y0)
+    part = numpy.rot90(numpy.asarray(image.crop((x0, y0, x1, y1))))
+    numpy.take(rgb565, part, out=words[:n].reshape(part.shape))
+    block(y0, width - x1, y1 - 1, width - x0 - 1, memoryview(pixels)[:2 * n])
+
 # Draw and display a black box to clear the image. Turn on the backlight.
-draw.rectangle((0, 0, width, height), fill=black)
-disp.image(image, rotation)
+draw.rectangle((0, 0, width, height), fill=ink[black])
+send(0, 0, width, height)
 back = digitalio.DigitalInOut(board.D22)
 back.switch_to_output()
 back.value = True
 
+# Keep a copy of what is on the display in front, so that only the parts of the
+# image that changed need to be sent to it. The bands are the rows of text,
+# each of which changes independently of the others.
+front = image.copy()
+bands = ((0, 26), (26, 54), (54, 82), (82, height))
+
+# Copy the changed parts of the image in the given bands to the display. The
+# smallest box around the changes in each band is sent.
+def update(changed):
+    for y0, y1 in changed:
+        box = ImageChops.difference(image.crop((0, y0, width, y1)),
+                                    front.crop((0, y0, width, y1))).getbbox()
+        if box:
+            x0, y0, x1, y1 = box[0], y0 + box[1], box[2], y0 + box[3]
+            front.paste(image.crop((x0, y0, x1, y1)), (x0, y0))
+            send(x0, y0, x1, y1)
+
 # Medium and large fonts to use.
 med = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 24)
 big = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 48)
 
+# Draw text in the image buffer. Rendering with FreeType is slow on a Pi Zero,
+# and the text is made from a small set of pieces, so each piece is rendered
+# once as a mask, and then pasted in the desired color after that. A piece is
+# a single character, or a run of letters, which keeps the kerning in words.
+# Any string that has been rendered whole with render() is pasted whole. The
+# antialiasing levels of the rendered text, 0..255, are rounded to 0..31, and
+# become the shades of the color in the palette. A level of zero is left as
+# the background, as given by the 0 or 255 mask.
+masks = {}
+steps = [(a * 31 + 127) // 255 for a in range(256)]
+def render(s, font, fill):
+    box = font.getbbox(s)
+    alpha = Image.new("L", (box[2] - box[0], box[3] - box[1]))
+    ImageDraw.Draw(alpha).text((-box[0], -box[1]), s, font=font, fill=255)
+    shades = alpha.point([ink[fill] - 31 + k if k else 0 for k in steps])
+    mask = alpha.point([255 if k else 0 for k in steps])
+    masks[s, font, fill] = (shades.convert("P"), mask, box[0], box[1],
+                            font.getlength(s))
+def text(xy, s, font, fill):
+    x, y = xy
+    whole = (s, font, fill) in masks
+    for piece in [s] if whole else re.findall(r"[A-Za-z]+|.", s):
+        if (piece, font, fill) not in masks:
+            # Render the piece the first time it's seen.
+            render(piece, font, fill)
+        shades, mask, dx, dy, advance = masks[piece, font, fill]
+        if mask.width:
+            image.paste(shades, (round(x) + dx, y + dy), mask)
+        x += advance
+
+# The switches interrupt the wait at the end of the main loop when they open or
+# close, so that the loop can respond promptly without polling them.
+wake = threading.Event()
+
+# The switch contacts bounce, chattering open and closed for a few milliseconds
+# when they change. So after a switch change wakes up the loop, wait for settle
+# seconds before reading the switches, with any more changes in that time
+# forgotten. Otherwise one press could read as closed, open, and closed again,
+# and toggle the sound or cycle the timeout twice. settle is the same as the
+# thirty-times-a-second polling that this replaced, which never saw a bounce.
+settle = 1 / 30
+
 # Connect up the GPIO pins. GPIO26 is the PTT switch, with the other end of the
 # switch connected to ground. GPIO19 is an output set high, which sources 3.3V
 # through a 47K resistor connected to GPIO26 (PTT). The push-to-talk switch
 # then pulls down GPIO26 when pushed. push is False if the PTT switch is open.
-# Otherwise it is the time the PTT switch was closed. These are the three
-# inside pins on the end of the header, opposite the display. (Note: GPIO19 and
-# the resistor are just for demonstrating with no radio. They are not needed
-# when connected to a radio, which provides its own pull-up resistor and
-# voltage. In that case, the three pullup lines below can be commented out.)
+# Otherwise it is the time the PTT switch was closed, in nanoseconds on the
+# monotonic clock. These are the three inside pins on the end of the header,
+# opposite the display. (Note: GPIO19 and the resistor are just for
+# demonstrating with no radio. They are not needed when connected to a radio,
+# which provides its own pull-up resistor and voltage. In that case, the three
+# pullup lines below can be commented out.)
 pullup = digitalio.DigitalInOut(board.D19)
 pullup.switch_to_output()
 pullup.value = True
-ptt = digitalio.DigitalInOut(board.D26)
-ptt.switch_to_input()
-push = False if ptt.value else time.monotonic()
-
-# Connect up the buttons. button.value is true if the button is up and false if
-# the button is down (go figure). The top button cycles between the sound on
-# and off. The bottom button cycles through the timeout values.
-top = digitalio.DigitalInOut(board.D23)
-top.switch_to_input()
-toggle = not top.value
-bot = digitalio.DigitalInOut(board.D24)
-bot.switch_to_input()
-cycle = not bot.value
-
-# Cycle of timeout values when pressing button B. Set initial timeout to 90.
-# The timeout value blinks and a buzzer buzzes in the last warn seconds.
-step = {90 : 60, 60 : 30, 30 : 15, 15 : 90}
-timeout = next(iter(step))
+ptt = Button(26, pull_up=None, active_state=False)
+ptt.when_pressed = ptt.when_released = wake.set
+push = time.monotonic_ns() if ptt.is_pressed else False
+
+# Connect up the buttons. The buttons have pull-ups on the display board, so
+# they read high when up and low when down. The top button cycles between the
+# sound on and off. The bottom button cycles through the timeout values.
+top = Button(23, pull_up=None, active_state=False)
+top.when_pressed = top.when_released = wake.set
+toggle = top.is_pressed
+bot = Button(24, pull_up=None, active_state=False)
+bot.when_pressed = bot.when_released = wake.set
+cycle = bot.is_pressed
+
+# Map the GPIO registers, in order to read the levels of all of the switches at
+# once from the GPLEV0 register, at offset 0x34. That is a single load instead
+# of going through gpiozero for each switch. gpiozero is still used to set up
+# the pins and to catch their changes. Bit n of gplev0() is the level of GPIOn,
+# so a switch is open if its bit is one. (This is for the BCM2837 in the Pi
+# Zero 2W, and works for the BCM283x and BCM2711 in the other Pis up to the Pi
+# 4. The Pi 5 has its GPIO pins elsewhere.)
+fd = os.open("/dev/gpiomem", os.O_RDWR | os.O_SYNC)
+gpio = mmap.mmap(fd, 4096)
+os.close(fd)
+def gplev0():
+    return struct.unpack_from("<I", gpio, 0x34)[0]
+
+# Cycle of timeout values when pressing button B, and the text to show for
+# each. index is the current one in the cycle. Set initial timeout to 90. The
+# timeout value blinks and a buzzer buzzes in the last warn seconds.
+timeouts = (90, 60, 30, 15)
+timeout_strs = tuple(f"T/O {t} s" for t in timeouts)
+index = 0
+timeout = timeouts[index]
 warn = 5
 
+# The countdown text for each tenth of a second, from minus to plus the longest
+# timeout, so that the time left doesn't need to be formatted on every frame.
+# The text for t tenths of a second is countdown_strs[t + most].
+most = 10 * max(timeouts)
+countdown_strs = tuple(f"  {t / 10:.1f} s" for t in range(-most, most + 1))
+
+# The messages shown while the top or bottom button is held. Render them whole
+# now, so that they are pasted with one mask each.
+sound_strs = ("Sound off", "Sound on")
+for msg in sound_strs:
+    render(msg, big, cyan)
+for msg in timeout_strs:
+    render(msg, big, red)
+
+# The status lines that can be shown under the times, as the pieces to draw in
+# the status band, each the arguments to text(). These are made once here, so
+# that the handlers below return one of these without building a new tuple on
+# every pass, and an unchanged status compares equal by identity. no_status is
+# an empty status band.
+no_status = ()
+sound_status = tuple((((0, 82), msg, big, cyan),) for msg in sound_strs)
+timeout_status = tuple((((0, 82), msg, big, red),) for msg in timeout_strs)
+countdown_status = tuple((((0, 82), msg, big, red),)
+                         for msg in countdown_strs)
+
 # Set up the buzzer. Default to sound enabled. The top button will cycle
 # between the sound enabled and disabled.
 sound = True
 silence = False
-buzz = False
 buzzer = pwmio.PWMOut(board.D21, frequency = 262, duty_cycle = 0)
 
+# The buzzer is turned on and off by its own thread, so that its timing does
+# not depend on the main loop. alarm is False for quiet, or else the time on
+# the monotonic clock, in nanoseconds, at which the countdown will reach zero.
+# Then the buzzer sounds on alternate thirds of a second up until that time,
+# while the time left is blanked on the display. Setting alarm to None ends the
+# thread. alarm is only changed with alarming held, and the thread is notified.
+alarm = False
+alarming = threading.Condition()
+def buzzing():
+    on = False
+    with alarming:
+        while alarm is not None:
+            left = alarm - time.monotonic_ns() if alarm else -1
+            phase = (3 * left + 500_000_000) // 1_000_000_000
+            if (left >= 0 and phase % 2 == 1) != on:
+                on = not on
+                buzzer.duty_cycle = 32768 if on else 0
+            # Wait until the phase next changes, or alarm changes.
+            alarming.wait((3 * left + 500_000_000) % 1_000_000_000 // 3 / 1e9
+                          + 1e-9 if left >= 0 else None)
+        if on:
+            buzzer.duty_cycle = 0
+tone = threading.Thread(target=buzzing, daemon=True)
+tone.start()
+
+# Set alarm, telling the buzzer thread if it changed.
+def ring(end):
+    global alarm
+    if end != alarm:
+        with alarming:
+            alarm = end
+            alarming.notify()
+
+# The wall-clock second for which the date and time strings were last made,
+# and the text last drawn in each band of the image, as the arguments to
+# text() for each piece. Nothing has been drawn yet.
+last_second = None
+shown = ((),) * len(bands)
+
+# The minute of the local time at which utc_offset was last computed.
+offset_minute = None
+
+# What to do for each state of the switches. Each of these is called on every
+# pass through the main loop, and returns the status line to show under the
+# times, from the status tables above. countdown() also sets due to the
+# nanoseconds until the countdown next changes what is shown or heard, if
+# that's less than a second.
+
+def released():
+    # The PTT switch is open.
+    global push, silence
+    push = False
+    silence = False
+    ring(False)
+
+def idle():
+    # The PTT switch and both buttons are open.
+    global cycle, toggle
+    released()
+    cycle = False
+    toggle = False
+    return no_status
+
+def sound_held():
+    # The PTT switch and the bottom button are open, and the top button is
+    # closed.
+    global cycle, toggle, sound
+    released()
+    cycle = False
+    if not toggle:
+        # The top button closed just now.
+        sound = not sound
+    toggle = True
+    return sound_status[sound]
+
+def timeout_held():
+    # The PTT switch is open, and the bottom button is closed.
+    global cycle, index, timeout
+    released()
+    if not cycle:
+        # The bottom button just closed -- cycle timeout.
+        index = (index + 1) % len(timeouts)
+        timeout = timeouts[index]
+        cycle = True
+    # As long as the bottom button remains closed, show the new timeout value.
+    return timeout_status[index]
+
+def countdown():
+    # The PTT switch is closed. Allow the top button to silence the buzzer for
+    # this countdown, without changing the sound state.
+    global push, silence, due
+    status = no_status
+    if not key & 1:
+        silence = True
+    if not push:
+        # The PTT just closed. Save the time this happened.
+        push = mono
+    elapsed = mono - push
+    left = timeout - elapsed / 1e9
+    if left < 0:
+        # Turn off the buzzer once zero is reached. It's too late, baby, now
+        # it's too late.
+        silence = True
+    if left < -timeouts[0]:
+        # The PTT seems stuck closed -- do nothing until it opens.
+        ring(False)
+        return status
+    # Show the time left, but blink when five seconds or less left. The phase
+    # is the parity of round(3 * left), computed exactly in integers from the
+    # elapsed nanoseconds. Alternately show the time and sound the buzzer
+    # every 1/3 second, where the buzzer thread keeps the same phase. Stop the
+    # buzzer immediately if the top button is pressed.
+    if left > warn or (timeout + (3 * elapsed + 500_000_000) //
+                       1_000_000_000) % 2 == 0:
+        status = countdown_status[round(10 * left) + most]
+    ring(push + timeout * 1_000_000_000
+         if left <= warn and sound and not silence else False)
+    # The countdown next changes when the tenths of a second shown change, and
+    # either when the warning starts or when the blink next switches.
+    due = 100_000_000 - (elapsed + 50_000_000) % 100_000_000
+    if left > warn:
+        due = min(due, (timeout - warn) * 1_000_000_000 - elapsed)
+    else:
+        due = min(due, (1_000_000_000 + 2 - (3 * elapsed + 500_000_000) %
+                        1_000_000_000) // 3)
+    return status
+
+# The switch states are combined into a three-bit key, with bit 0 for the top
+# button, bit 1 for the bottom button, and bit 2 for the PTT switch. A bit is
+# one when its switch is open. handlers[key] is what to do for that state: a
+# countdown whenever the PTT switch is closed, else the timeout whenever the
+# bottom button is closed, else the sound if the top button is closed.
+handlers = (countdown, countdown, countdown, countdown,
+            timeout_held, timeout_held, sound_held, idle)
+
 try:
     # Do this forever, until interrupted with a ^C, or there is an error.
     while True:
-        # Put the current date, local time, and UTC time in the image buffer.
-        draw.rectangle((0, 0, width, height), fill=black)
-        draw.text((0, -2), datetime.now().strftime("%b %d, %Y"),
-                  font=med, fill=white)
-        draw.text((0, 26), "LOC " + datetime.now().strftime("%a"),
-                  font=med, fill=green)
-        draw.text((116, 26), datetime.now().strftime("%H:%M:%S"),
-                  font=med, fill=green)
-        draw.text((0, 54), "UTC " + datetime.utcnow().strftime("%a"),
-                  font=med, fill=yellow)
-        draw.text((116, 54), datetime.utcnow().strftime("%H:%M:%S"),
-                  font=med, fill=yellow)
-
-        # Check the PTT switch. Check button B if the PTT switch is open. Check
-        # button A if both PTT and B are open.
-        if ptt.value:
-            # The PTT switch is open.
-            push = False
-            silence = False
-            buzzer.duty_cycle = 0
-            buzz = False
-            if bot.value:
-                # The bottom button is open.
-                cycle = False
-                if top.value:
-                    # The top button is open.
-                    toggle = False
-                else:
-                    # The top button is closed.
-                    if not toggle:
-                        # The top button closed just now.
-                        sound = not sound
-                    toggle = True
-                    draw.text((0, 82), f"Sound {'on' if sound else 'off'}",
-                              font=big, fill=cyan)
-            else:
-                # The bottom button is closed.
-                if not cycle:
-                    # The bottom button just closed -- cycle timeout.
-                    timeout = step[timeout]
-                    cycle = True
-                # As long as the bottom button remains closed, show the new
-                # timeout value.
-                draw.text((0, 82), f"T/O {timeout} s", font=big, fill=red)
-        else:
-            # The PTT switch is closed. Allow the top button to silence the
-            # buzzer for this countdown, without changing the sound state.
-            if not top.value:
-                silence = True
-            if not push:
-                # The PTT just closed. Save the time this happened.
-                push = time.monotonic()
-            left = timeout - time.monotonic() + push
-            if left < 0:
-                # Turn off the buzzer once zero is reached. It's too late,
-                # baby, now it's too late.
-                silence = True
-            if left < -next(iter(step)):
-                # The PTT seems stuck closed -- do nothing until it opens.
-                buzzer.duty_cycle = 0
-                buzz = False
-            # Show the time left, but blink when five seconds or less left.
-            elif left > warn or round(3 * left) % 2 == 0:
-                # Alternately show time and sound buzzer every 1/3 second.
-                buzzer.duty_cycle = 0
-                buzz = False
-                draw.text((0, 82), f"  {left:.1f} s", font=big, fill=red)
-            elif silence:
-                # Immediately stop the buzzer if the top button is pressed.
-                buzzer.duty_cycle = 0
-                buzz = False
-            elif sound:
-                # Turn the buzzer on and off in the last five seconds.
-                if not buzz:
-                    buzzer.duty_cycle = 32768
-                    buzz = True
-
-        # Copy the image buffer to the display.
-        disp.image(image, rotation)
-
-        # Update the display and check the switches thirty times a second.
-        time.sleep(1/30)
+        # Get the time once for this pass through the loop, both on the wall
+        # clock for the display, and on the monotonic clock for the countdown.
+        # The monotonic clock does not jump when NTP sets the wall clock.
+        wall = time.time()
+        mono = time.monotonic_ns()
+
+        # Get the date, local time, and UTC time strings. Those only change
+        # once a second, so only make them when the second changes. Make them
+        # all from the same second, so that they agree with each other.
+        sec = int(wall)
+        if sec != last_second:
+            last_second = sec
+            now = datetime.fromtimestamp(sec)
+            if now.minute != offset_minute:
+                # Get the offset from local time to UTC. It only changes when
+                # daylight saving time starts or ends, which is always at the
+                # start of a minute, so only get it once a minute. (Not once an
+                # hour, since the end of daylight saving time repeats an hour.)
+                offset_minute = now.minute
+                utc_offset = now.astimezone().utcoffset()
+            utc = now - utc_offset
+
+            # Format all of the strings for each time at once, and split them.
+            date_str, loc_day, loc_time = now.strftime(
+                "%b %d, %Y\nLOC %a\n%H:%M:%S").split("\n")
+            utc_day, utc_time = utc.strftime("UTC %a\n%H:%M:%S").split("\n")
+
+            # Make the pieces to draw in the date, local time, and UTC time
+            # bands, each the arguments to text().
+            date_band = (((0, -2), date_str, med, white),)
+            loc_band = (((0, 26), loc_day, med, green),
+                        ((116, 26), loc_time, med, green))
+            utc_band = (((0, 54), utc_day, med, yellow),
+                        ((116, 54), utc_time, med, yellow))
+
+        # Forget any switch changes before this point, and read the switches
+        # all at once into the key. Then do what that state of the switches
+        # calls for.
+        wake.clear()
+        levels = gplev0()
+        key = levels >> 23 & 3 | levels >> 24 & 4
+        due = 1_000_000_000
+        status = handlers[key]()
+
+        # Redraw only the bands of the image whose text changed, and copy
+        # the changes in those to the display. A pass can be woken by a switch
+        # change or a countdown deadline when nothing shown has changed, and
+        # on most passes only the seconds have. A changed band is cleared to
+        # black by itself, leaving the rest of the image as it is.
+        frame = (date_band, loc_band, utc_band, status)
+        changed = []
+        for band, pieces, was in zip(bands, frame, shown):
+            if pieces != was:
+                draw.rectangle((0, band[0], width - 1, band[1] - 1),
+                               fill=ink[black])
+                for piece in pieces:
+                    text(*piece)
+                changed.append(band)
+        if changed:
+            shown = frame
+            update(changed)
+
+        # Wait for a switch to open or close. Otherwise wake up just in time
+        # for the next change of the countdown, or else at the next second for
+        # the clock. Both are measured from the start of this pass, so take
+        # off the time spent since then. If a switch changed, let it settle
+        # before reading it.
+        if wake.wait(min(due / 1e9, 1 - wall % 1) -
+                     (time.monotonic_ns() - mono) / 1e9):
+            time.sleep(settle)
 
 except KeyboardInterrupt:
     # Backup and overwrite the displayed interrupt character (^C).
@@ -272,11 +580,17 @@ except KeyboardInterrupt:
 finally:
     # Exit cleanly, resetting the GPIO pins, blanking the screen, turning off
     # the backlight, and killing the buzzer.
+    with alarming:
+        alarm = None
+        alarming.notify()
+    tone.join()
     buzzer.deinit()
-    bot.deinit()
-    top.deinit()
-    ptt.deinit()
+    gpio.close()
+    bot.close()
+    top.close()
+    ptt.close()
     pullup.deinit()
-    draw.rectangle((0, 0, width, height), fill=black)
-    disp.image(image, rotation)
+    draw.rectangle((0, 0, width, height), fill=ink[black])
+    send(0, 0, width, height)
     back.value = False
+    spi.close()